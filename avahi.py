@@ -12,14 +12,28 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import os
+import re
 import subprocess
 import sys
-from dataclasses import dataclass
-from typing import Dict, List, Sequence
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
 
-@dataclass
-class HostRecord:
+_IPV4_LINE = re.compile(rb"[=+];[^;]+;IPv4;")
+
+
+def _print_debug(message: str) -> None:
+    print(f"[DEBUG] {message}", file=sys.stderr)
+
+
+def _skip_debug(message: str) -> None:
+    pass
+
+
+class HostRecord(NamedTuple):
     base_name: str
     fqdn: str
     preferred_ip: str
@@ -32,30 +46,37 @@ class AvahiClient:
         browse_cmd=None,
         resolve_cmd=None,
         debug: bool = False,
+        cache_path: Optional[str] = None,
+        cache_ttl: float = 0,
     ):
         self._browse_cmd = browse_cmd or ["avahi-browse", "-alrpt", "--parsable"]
         self._resolve_cmd = resolve_cmd or ["avahi-resolve-host-name", "-4"]
         self._debug = debug
+        self._log_debug = _print_debug if debug else _skip_debug
+        self._cache_path = cache_path if cache_ttl > 0 else None
+        self._cache_ttl = cache_ttl
+        self._cached_candidates: Optional[Dict[str, List[str]]] = None
+        self._cached_at = 0.0
 
     def discover_hosts(self, domain_suffix: str, keep_local: bool = False) -> List[HostRecord]:
-        raw = self._run_browse()
-        candidates = self._collect_candidates(raw)
+        candidates = self._load_candidates()
         if not candidates:
             print("[ERROR] No IPv4 mDNS records discovered via avahi-browse", file=sys.stderr)
-        else:
+        elif self._debug:
             debug_map = {f"{name}.local": ips for name, ips in candidates.items()}
             self._log_debug(f"Avahi IPv4 candidates: {debug_map}")
+        resolved = self._resolve_ipv4_batch(list(candidates))
         records = []
         for base_name, ips in candidates.items():
-            ordered_ips = list(ips)
-            preferred = self._resolve_preferred(base_name, ordered_ips)
-            fqdn = f"{base_name}.{domain_suffix}" if domain_suffix else base_name
+            ordered_ips = self._resolve_preferred(ips, resolved.get(base_name, ""))
+            preferred = ordered_ips[0] if ordered_ips else ""
+            fqdn = sys.intern(f"{base_name}.{domain_suffix}") if domain_suffix else base_name
             suffixes = [fqdn]
             if keep_local and fqdn != f"{base_name}.local":
-                suffixes.append(f"{base_name}.local")
-            if ordered_ips:
+                suffixes.append(sys.intern(f"{base_name}.local"))
+            if self._debug and ordered_ips:
                 self._log_debug(
-                    f"Avahi candidates for {base_name}.local: {ordered_ips}",
+                    f"Avahi candidates for {base_name}.local: {list(ordered_ips)}",
                 )
             for fqdn_variant in suffixes:
                 records.append(
@@ -63,77 +84,165 @@ class AvahiClient:
                         base_name=base_name,
                         fqdn=fqdn_variant,
                         preferred_ip=preferred,
-                        candidates=tuple(ordered_ips),
+                        candidates=ordered_ips,
                     )
                 )
         return records
 
-    def _run_browse(self) -> str:
+    def _load_candidates(self) -> Dict[str, List[str]]:
+        now = time.monotonic()
+        if self._cached_candidates is not None and now - self._cached_at < self._cache_ttl:
+            self._log_debug("Using in-memory avahi-browse results")
+            return self._cached_candidates
+        cached = self._read_cache()
+        if cached is None:
+            candidates = self._collect_candidates(self._iter_browse_lines())
+            if not candidates:
+                return candidates
+            self._write_cache(candidates)
+            age = 0.0
+        else:
+            candidates, age = cached
+        self._cached_candidates = candidates
+        self._cached_at = now - age
+        return candidates
+
+    def _read_cache(self) -> Optional[Tuple[Dict[str, List[str]], float]]:
+        if not self._cache_path:
+            return None
         try:
-            return subprocess.check_output(
-                self._browse_cmd,
-                stderr=subprocess.DEVNULL,
-                text=True,
-                errors="replace",
+            age = time.time() - os.stat(self._cache_path).st_mtime
+            if not 0 <= age < self._cache_ttl:
+                return None
+            with open(self._cache_path, encoding="utf-8") as cache_file:
+                cached = json.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            self._log_debug(f"Ignoring unreadable Avahi cache {self._cache_path}: {exc}")
+            return None
+        candidates = None
+        if isinstance(cached, dict) and cached.get("browse_cmd") == list(self._browse_cmd):
+            candidates = cached.get("candidates")
+        if not self._is_candidate_map(candidates):
+            self._log_debug(f"Ignoring invalid Avahi cache {self._cache_path}")
+            return None
+        self._log_debug(f"Using cached avahi-browse results from {self._cache_path}")
+        return candidates, age
+
+    def _write_cache(self, candidates: Dict[str, List[str]]) -> None:
+        if not self._cache_path:
+            return
+        tmp_path = f"{self._cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self._cache_path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(
+                    {"browse_cmd": list(self._browse_cmd), "candidates": candidates},
+                    cache_file,
+                )
+            os.replace(tmp_path, self._cache_path)
+        except OSError as exc:
+            self._log_debug(f"Failed to write Avahi cache {self._cache_path}: {exc}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _is_candidate_map(value) -> bool:
+        return (
+            isinstance(value, dict)
+            and bool(value)
+            and all(
+                isinstance(ips, list) and all(isinstance(ip, str) for ip in ips)
+                for ips in value.values()
             )
-        except subprocess.CalledProcessError:
-            return ""
+        )
+
+    def _iter_browse_lines(self) -> Iterator[bytes]:
+        with subprocess.Popen(
+            self._browse_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        ) as proc:
+            yield from proc.stdout
+        if proc.returncode:
+            self._log_debug(f"avahi-browse exited with status {proc.returncode}")
 
     @staticmethod
-    def _collect_candidates(raw: str) -> Dict[str, List[str]]:
+    def _collect_candidates(lines: Iterable[bytes]) -> Dict[str, List[str]]:
         seen = set()
-        candidates: Dict[str, List[str]] = {}
-        for line in raw.splitlines():
-            if "IPv4" not in line:
+        candidates: Dict[str, List[str]] = defaultdict(list)
+        for line in lines:
+            match = _IPV4_LINE.match(line)
+            if match is None:
                 continue
-            cols = line.split(";")
-            try:
-                raw_host = cols[6].strip()
-                ip_field = cols[7].strip()
-            except IndexError:
+            host_start = match.end()
+            for _ in range(3):
+                host_start = line.find(b";", host_start)
+                if host_start == -1:
+                    break
+                host_start += 1
+            if host_start == -1:
+                continue
+            host_end = line.find(b";", host_start)
+            if host_end == -1:
                 continue
+            ip_end = line.find(b";", host_end + 1)
+            if ip_end == -1:
+                ip_end = len(line)
+            raw_host = line[host_start:host_end].strip()
+            ip_field = line[host_end + 1:ip_end].strip()
             if not raw_host or not ip_field:
                 continue
-            base_name = raw_host[:-6] if raw_host.endswith(".local") else raw_host
-            key = (base_name, ip_field)
+            if raw_host[-6:] == b".local":
+                raw_host = raw_host[:-6]
+            key = (raw_host, ip_field)
             if key in seen:
                 continue
             seen.add(key)
-            host_ips = candidates.setdefault(base_name, [])
+            base_name = sys.intern(raw_host.decode("utf-8", "replace"))
+            ip_field = sys.intern(ip_field.decode("utf-8", "replace"))
+            host_ips = candidates[base_name]
             if ip_field not in host_ips:
                 host_ips.append(ip_field)
         return candidates
 
-    def _resolve_preferred(self, base_name: str, candidates: List[str]) -> str:
-        resolved_ip = self._resolve_ipv4(base_name)
+    @staticmethod
+    def _resolve_preferred(candidates: List[str], resolved_ip: str) -> Tuple[str, ...]:
         if resolved_ip:
-            if resolved_ip not in candidates:
-                candidates.insert(0, resolved_ip)
-            else:
-                candidates.remove(resolved_ip)
-                candidates.insert(0, resolved_ip)
-        return candidates[0] if candidates else resolved_ip or ""
-
-    def _resolve_ipv4(self, base_name: str) -> str:
-        mdns_name = f"{base_name}.local"
-        try:
-            result = subprocess.check_output(
-                [*self._resolve_cmd, mdns_name],
-                stderr=subprocess.DEVNULL,
-                text=True,
-                errors="replace",
-            )
-        except subprocess.CalledProcessError:
-            self._log_debug(f"Resolution failed for {mdns_name}")
-            return ""
+            return (resolved_ip, *[ip for ip in candidates if ip != resolved_ip])
+        return tuple(candidates)
+
+    def _resolve_ipv4_batch(self, base_names: List[str]) -> Dict[str, str]:
+        if not base_names:
+            return {}
+        mdns_names: Dict[str, List[str]] = defaultdict(list)
+        for name in base_names:
+            mdns_names[f"{name}.local".casefold()].append(name)
+        result = subprocess.run(
+            [*self._resolve_cmd, *(f"{name}.local" for name in base_names)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors="replace",
+        ).stdout
+        resolved: Dict[str, str] = {}
         for line in result.splitlines():
             parts = line.strip().split()
-            if len(parts) >= 2 and parts[-1]:
-                self._log_debug(f"Resolved {mdns_name} -> {parts[-1]}")
-                return parts[-1]
-        self._log_debug(f"No IPv4 address found in resolution output for {mdns_name}")
-        return ""
-
-    def _log_debug(self, message: str) -> None:
+            if len(parts) < 2 or not parts[-1]:
+                continue
+            for base_name in mdns_names.get(parts[0].rstrip(".").casefold(), ()):
+                if base_name in resolved:
+                    continue
+                resolved[base_name] = parts[-1]
+                if self._debug:
+                    self._log_debug(f"Resolved {base_name}.local -> {parts[-1]}")
         if self._debug:
-            print(f"[DEBUG] {message}", file=sys.stderr)
+            for base_name in base_names:
+                if base_name not in resolved:
+                    self._log_debug(
+                        f"No IPv4 address found in resolution output for {base_name}.local"
+                    )
+        return resolved
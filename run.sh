@@ -20,6 +20,8 @@
 # DOMAIN_SUFFIX: default is 'local'
 # INTERVAL: sleep time in seconds between syncs (default: 300)
 # AVAHI_DISABLE_AUTOSTART: set to 1 to disable auto-start of avahi-daemon and dbus-daemon
+# AVAHI_CACHE_TTL: seconds to reuse avahi-browse results across syncs (default: 0, disabled);
+#   only takes effect when INTERVAL is shorter than the TTL
 
 
 # On Host Machine, run this:
@@ -14,14 +14,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import http.client
+import json
 import os
 import sys
-from typing import Dict, Iterable
-
-import requests
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 from avahi import AvahiClient, HostRecord
 
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
 
 def _debug_log(enabled: bool, message: str) -> None:
     if enabled:
@@ -31,25 +42,49 @@ def _debug_log(enabled: bool, message: str) -> None:
 class PiHoleClient:
     def __init__(self, api_url: str, token: str, debug: bool = False):
         self.api_url = api_url
-        self.session = requests.Session()
-        self.session.headers.update(
-            {"accept": "application/json", "content-type": "application/json"}
+        url = urlsplit(api_url)
+        connection_cls = (
+            http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
         )
+        self._conn = connection_cls(url.hostname, url.port)
+        self._base_path = url.path.rstrip("/")
         self.sid = self._authenticate(token)
         self.debug = debug
 
+    def _request(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Any] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, str, bytes]:
+        request_headers = {"accept": "application/json"}
+        if headers:
+            request_headers.update(headers)
+        body = None
+        if payload is not None:
+            body = _json_dumps(payload)
+            request_headers["content-type"] = "application/json"
+        url = f"{self._base_path}{path}"
+        try:
+            self._conn.request(method, url, body=body, headers=request_headers)
+            resp = self._conn.getresponse()
+        except (BrokenPipeError, ConnectionResetError):
+            self._conn.close()
+            self._conn.request(method, url, body=body, headers=request_headers)
+            resp = self._conn.getresponse()
+        return resp.status, resp.reason, resp.read()
+
     def _authenticate(self, token: str) -> str:
         clean_token = token.strip()
         if not clean_token:
             raise RuntimeError("Empty PIHOLE_TOKEN after stripping whitespace")
-        auth_resp = self.session.post(f"{self.api_url}/auth", json={"password": clean_token})
-        try:
-            auth_resp.raise_for_status()
-        except requests.HTTPError as exc:
-            detail = auth_resp.text.strip()
-            msg = detail or auth_resp.reason or "Unauthorized"
-            raise RuntimeError(f"Pi-hole authentication failed: {msg}") from exc
-        auth_json = auth_resp.json()
+        status, reason, data = self._request("POST", "/auth", {"password": clean_token})
+        if not 200 <= status < 300:
+            detail = data.decode("utf-8", "replace").strip()
+            msg = detail or reason or "Unauthorized"
+            raise RuntimeError(f"Pi-hole authentication failed: {msg}")
+        auth_json = _json_loads(data)
         try:
             return auth_json["session"]["sid"]
         except Exception as exc:  # pragma: no cover - defensive guard
@@ -62,15 +97,15 @@ class PiHoleClient:
         return {"accept": "application/json", "sid": self.sid}
 
     def fetch_hosts(self) -> Dict[str, str]:
-        resp = self.session.get(f"{self.api_url}/config/dns%2Fhosts", headers=self.headers)
-        resp.raise_for_status()
-        cfg = resp.json()
+        status, reason, data = self._request("GET", "/config/dns%2Fhosts", headers=self.headers)
+        if not 200 <= status < 300:
+            raise RuntimeError(f"Failed to fetch Pi-hole config: {status} {reason}")
+        cfg = _json_loads(data)
         dns_map: Dict[str, str] = {}
         for entry in cfg.get("config", {}).get("dns", {}).get("hosts", []):
-            parts = entry.split()
+            parts = entry.split(None, 2)
             if len(parts) >= 2:
-                ip, host = parts[0], parts[1]
-                dns_map[host] = ip
+                dns_map[sys.intern(parts[1])] = sys.intern(parts[0])
             else:
                 print(f"[WARN] Unexpected hosts entry: {entry}", file=sys.stderr)
         if self.debug:
@@ -79,45 +114,45 @@ class PiHoleClient:
         return dns_map
 
     def update_hosts(self, dns_map: Dict[str, str]) -> None:
-        hosts_list = [f"{ip} {host}" for host, ip in dns_map.items()]
-        payload = {"config": {"dns": {"hosts": sorted(hosts_list)}}}
+        hosts_list = [ip + " " + host for host, ip in dns_map.items()]
+        hosts_list.sort()
+        payload = {"config": {"dns": {"hosts": hosts_list}}}
         if self.debug:
-            print(
-                f"[DEBUG] Updating Pi-hole hosts payload: {sorted(dns_map.items())}",
-                file=sys.stderr,
-            )
-        set_resp = self.session.patch(
-            f"{self.api_url}/config/dns%2Fhosts",
+            print(f"[DEBUG] Updating Pi-hole hosts payload: {hosts_list}", file=sys.stderr)
+        status, _, data = self._request(
+            "PATCH",
+            "/config/dns%2Fhosts",
+            payload,
             headers=self.headers,
-            json=payload,
         )
-        if not set_resp.ok:
+        if not 200 <= status < 300:
             raise RuntimeError(
-                f"Failed to update Pi-hole config: {set_resp.status_code} {set_resp.text}"
+                f"Failed to update Pi-hole config: {status} {data.decode('utf-8', 'replace')}"
             )
 
     def close(self) -> None:
         try:
-            del_resp = self.session.delete(f"{self.api_url}/auth", headers=self.headers)
-            if not del_resp.ok:
+            status, _, data = self._request("DELETE", "/auth", headers=self.headers)
+            if not 200 <= status < 300:
                 print(
-                    f"[WARN] Pi-hole logout failed: {del_resp.status_code} {del_resp.text.strip()}",
+                    f"[WARN] Pi-hole logout failed: {status} {data.decode('utf-8', 'replace').strip()}",
                     file=sys.stderr,
                 )
         finally:
-            self.session.close()
+            self._conn.close()
 
 
-def sync_iteration(
+async def sync_iteration(
     pihole_client: "PiHoleClient",
     avahi_client: "AvahiClient",
     domain_suffix: str,
     keep_local: bool,
     debug: bool = False,
 ) -> Dict[str, str]:
-    dns_map = pihole_client.fetch_hosts()
-
-    records = avahi_client.discover_hosts(domain_suffix, keep_local=keep_local)
+    dns_map, records = await asyncio.gather(
+        asyncio.to_thread(pihole_client.fetch_hosts),
+        asyncio.to_thread(avahi_client.discover_hosts, domain_suffix, keep_local=keep_local),
+    )
     if debug:
         avahi_debug = {
             record.fqdn: list(record.candidates) for record in records
@@ -125,10 +160,14 @@ def sync_iteration(
         _debug_log(debug, f"Avahi hosts discovered: {avahi_debug}")
 
     updated = apply_avahi_records(dns_map, records, debug=debug)
-    _debug_log(
-        debug,
-        f"Updating Pi-hole with {len(updated)} hosts: {sorted(updated.items())}",
-    )
+    if updated == dns_map:
+        _debug_log(debug, "No changes; skipping Pi-hole update")
+        return updated
+    if debug:
+        print(
+            f"[DEBUG] Updating Pi-hole with {len(updated)} hosts: {sorted(updated.items())}",
+            file=sys.stderr,
+        )
 
     pihole_client.update_hosts(updated)
     return updated
@@ -140,27 +179,36 @@ def apply_avahi_records(
     debug: bool = False,
 ) -> Dict[str, str]:
     updated = dict(dns_map)
+    grouped: Dict[Tuple[str, str], List[HostRecord]] = defaultdict(list)
     for record in records:
-        host = record.fqdn
-        preferred_ip = record.preferred_ip
-        existing_ip = updated.get(host)
+        grouped[(record.base_name, record.preferred_ip)].append(record)
+    info_lines: List[str] = []
+    warn_lines: List[str] = []
+    for (base_name, preferred_ip), host_records in grouped.items():
         if not preferred_ip:
-            print(
-                f"[WARN] No preferred IP resolved for {record.base_name}.local; skipping",
-                file=sys.stderr,
-            )
+            warn_lines.append(f"[WARN] No preferred IP resolved for {base_name}.local; skipping")
             continue
-        if existing_ip is None:
-            print(f"[INFO] Discovered: {host} -> {preferred_ip}")
-        elif existing_ip != preferred_ip:
-            print(
-                f"[WARN] Updating information for {host}: Avahi candidates {list(record.candidates)} -> chosen {preferred_ip}",
-                file=sys.stderr,
+        changed_hosts = []
+        for record in host_records:
+            host = record.fqdn
+            existing_ip = updated.get(host)
+            if existing_ip is None:
+                info_lines.append(f"[INFO] Discovered: {host} -> {preferred_ip}")
+            elif existing_ip != preferred_ip:
+                changed_hosts.append(host)
+            else:
+                if debug:
+                    print(f"[DEBUG] No change for {host}; remains {existing_ip}", file=sys.stderr)
+                continue
+            updated[host] = preferred_ip
+        if changed_hosts:
+            warn_lines.append(
+                f"[WARN] Updating information for {', '.join(changed_hosts)}: Avahi candidates {list(host_records[0].candidates)} -> chosen {preferred_ip}"
             )
-        else:
-            _debug_log(debug, f"No change for {host}; remains {existing_ip}")
-            continue
-        updated[host] = preferred_ip
+    if info_lines:
+        sys.stdout.write("\n".join(info_lines) + "\n")
+    if warn_lines:
+        sys.stderr.write("\n".join(warn_lines) + "\n")
     return updated
 
 
@@ -175,18 +223,32 @@ def main() -> None:
         print("[ERROR] Missing API token (PIHOLE_TOKEN)", file=sys.stderr)
         sys.exit(1)
 
+    try:
+        avahi_cache_ttl = float(os.getenv("AVAHI_CACHE_TTL", "0"))
+        if not 0 <= avahi_cache_ttl < float("inf"):
+            raise ValueError(avahi_cache_ttl)
+    except ValueError:
+        print("[ERROR] Invalid AVAHI_CACHE_TTL", file=sys.stderr)
+        sys.exit(1)
+
     _debug_log(debug_enabled, "Debug logging enabled")
 
-    avahi_client = AvahiClient(debug=debug_enabled)
+    avahi_client = AvahiClient(
+        debug=debug_enabled,
+        cache_path="/run/dns-proxy/avahi.cache" if avahi_cache_ttl > 0 else None,
+        cache_ttl=avahi_cache_ttl,
+    )
     pihole_client = None
     try:
         pihole_client = PiHoleClient(pihole_api, pihole_token, debug=debug_enabled)
-        sync_iteration(
-            pihole_client,
-            avahi_client,
-            domain_suffix,
-            keep_local=keep_local,
-            debug=debug_enabled,
+        asyncio.run(
+            sync_iteration(
+                pihole_client,
+                avahi_client,
+                domain_suffix,
+                keep_local=keep_local,
+                debug=debug_enabled,
+            )
         )
     except RuntimeError as exc:
         print(f"[ERROR] {exc}", file=sys.stderr)
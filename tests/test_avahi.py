@@ -0,0 +1,227 @@
+# Copyright 2025 Mike Ponomarenko
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from avahi import AvahiClient
+
+
+BROWSE_OUTPUT = [
+    f"{line}\n".encode("utf-8")
+    for line in [
+        "+;eth0;IPv4;tower;_ssh._tcp;local",
+        "=;eth0;IPv4;tower;_ssh._tcp;local;tower.local;10.0.115.5;22;",
+        "=;eth0;IPv4;tower [web];_http._tcp;local;tower.local;10.0.115.5;80;",
+        "=;eth1;IPv4;tower;_smb._tcp;local;tower.local;10.0.115.4;445;",
+        "=;eth0;IPv6;tower;_ssh._tcp;local;tower.local;fe80::1;22;",
+        "=;eth0;IPv6;IPv4 bridge;_http._tcp;local;bridge.local;fe80::2;80;",
+        "=;eth0;IPv4;printer;_ipp._tcp;local;printer.local;10.0.0.50;631;\"txt\"",
+        "=;eth0;IPv4;nas;_smb._tcp;local;nas;10.0.0.20",
+        "=;eth0;IPv4;broken;_smb._tcp;local;;10.0.0.99;445;",
+    ]
+]
+
+
+class CollectCandidatesTests(unittest.TestCase):
+    def test_collects_ipv4_addresses_per_host(self):
+        candidates = AvahiClient._collect_candidates(BROWSE_OUTPUT)
+
+        self.assertEqual(
+            {
+                "tower": ["10.0.115.5", "10.0.115.4"],
+                "printer": ["10.0.0.50"],
+                "nas": ["10.0.0.20"],
+            },
+            dict(candidates),
+        )
+
+    def test_empty_output(self):
+        self.assertEqual({}, dict(AvahiClient._collect_candidates([])))
+
+
+class ResolveBatchTests(unittest.TestCase):
+    def test_partial_output_with_failure_status(self):
+        # Echoes tower in upper case, leaves nas unresolved, then fails.
+        resolve_cmd = [
+            "sh",
+            "-c",
+            'printf "TOWER.local\\t10.0.115.4\\nprinter.local\\t10.0.0.50\\n"; exit 1',
+            "sh",
+        ]
+        client = AvahiClient(resolve_cmd=resolve_cmd)
+
+        resolved = client._resolve_ipv4_batch(["tower", "printer", "nas"])
+
+        self.assertEqual({"tower": "10.0.115.4", "printer": "10.0.0.50"}, resolved)
+
+    def test_no_names_skips_resolver(self):
+        client = AvahiClient(resolve_cmd=["false"])
+
+        self.assertEqual({}, client._resolve_ipv4_batch([]))
+
+
+class DiscoverHostsTests(unittest.TestCase):
+    def test_records_prefer_resolved_address(self):
+        browse_cmd = ["printf", "%s", b"".join(BROWSE_OUTPUT).decode("utf-8")]
+        resolve_cmd = [
+            "sh",
+            "-c",
+            'printf "tower.local\\t10.0.115.4\\nprinter.local\\t10.0.0.99\\n"',
+        ]
+        client = AvahiClient(browse_cmd=browse_cmd, resolve_cmd=resolve_cmd, cache_ttl=30)
+
+        records = client.discover_hosts("home", keep_local=True)
+
+        self.assertEqual(
+            [
+                ("tower", "tower.home", "10.0.115.4", ("10.0.115.4", "10.0.115.5")),
+                ("tower", "tower.local", "10.0.115.4", ("10.0.115.4", "10.0.115.5")),
+                ("printer", "printer.home", "10.0.0.99", ("10.0.0.99", "10.0.0.50")),
+                ("printer", "printer.local", "10.0.0.99", ("10.0.0.99", "10.0.0.50")),
+                ("nas", "nas.home", "10.0.0.20", ("10.0.0.20",)),
+                ("nas", "nas.local", "10.0.0.20", ("10.0.0.20",)),
+            ],
+            [tuple(record) for record in records],
+        )
+        for home, local in zip(records[::2], records[1::2]):
+            self.assertIs(home.candidates, local.candidates)
+        self.assertIs(sys.intern("tower.home"), records[0].fqdn)
+        self.assertEqual(
+            {
+                "tower": ["10.0.115.5", "10.0.115.4"],
+                "printer": ["10.0.0.50"],
+                "nas": ["10.0.0.20"],
+            },
+            dict(client._cached_candidates),
+        )
+
+
+class CandidateCacheTests(unittest.TestCase):
+    EXPECTED = {
+        "tower": ["10.0.115.5", "10.0.115.4"],
+        "printer": ["10.0.0.50"],
+        "nas": ["10.0.0.20"],
+    }
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.cache_path = os.path.join(tmp_dir.name, "dns-proxy", "avahi.cache")
+        self.browse_cmd = ["printf", "%s", b"".join(BROWSE_OUTPUT).decode("utf-8")]
+
+    def _client(self, browse_cmd=None, **kwargs):
+        kwargs.setdefault("cache_path", self.cache_path)
+        kwargs.setdefault("cache_ttl", 30)
+        return AvahiClient(
+            browse_cmd=browse_cmd or self.browse_cmd,
+            resolve_cmd=["true"],
+            **kwargs,
+        )
+
+    def _write_cache(self, content):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(self.cache_path, "w", encoding="utf-8") as cache_file:
+            cache_file.write(content)
+
+    def test_fresh_file_skips_browse(self):
+        # Counts its own runs so the second client can be shown not to browse.
+        runs_path = os.path.join(os.path.dirname(self.cache_path), "runs")
+        browse_cmd = [
+            "sh",
+            "-c",
+            'echo run >> "$0"; printf "%s" "$1"',
+            runs_path,
+            b"".join(BROWSE_OUTPUT).decode("utf-8"),
+        ]
+        os.makedirs(os.path.dirname(self.cache_path))
+
+        first = self._client(browse_cmd=browse_cmd)._load_candidates()
+        second = self._client(browse_cmd=browse_cmd)._load_candidates()
+
+        self.assertEqual(self.EXPECTED, dict(first))
+        self.assertEqual(self.EXPECTED, second)
+        with open(runs_path, encoding="utf-8") as runs_file:
+            self.assertEqual(1, len(runs_file.readlines()))
+
+    def test_stale_file_is_rescanned(self):
+        self._client()._load_candidates()
+        stale = time.time() - 60
+        os.utime(self.cache_path, (stale, stale))
+
+        client = self._client(browse_cmd=["false"])
+
+        self.assertEqual({}, client._load_candidates())
+
+    def test_future_mtime_is_stale(self):
+        self._client()._load_candidates()
+        future = time.time() + 3600
+        os.utime(self.cache_path, (future, future))
+
+        client = self._client(browse_cmd=["false"])
+
+        self.assertEqual({}, client._load_candidates())
+
+    def test_disk_hit_keeps_file_age_in_memory(self):
+        self._client()._load_candidates()
+        aged = time.time() - 25
+        os.utime(self.cache_path, (aged, aged))
+        client = self._client()
+
+        self.assertEqual(self.EXPECTED, client._load_candidates())
+        self.assertGreaterEqual(time.monotonic() - client._cached_at, 25)
+
+    def test_in_memory_hit_skips_browse(self):
+        client = self._client(cache_path=None)
+        self.assertEqual(self.EXPECTED, dict(client._load_candidates()))
+
+        client._browse_cmd = ["false"]
+
+        self.assertEqual(self.EXPECTED, dict(client._load_candidates()))
+
+    def test_empty_scan_is_not_cached(self):
+        client = self._client(browse_cmd=["false"])
+
+        self.assertEqual({}, client._load_candidates())
+        self.assertFalse(os.path.exists(self.cache_path))
+
+        client._browse_cmd = self.browse_cmd
+        self.assertEqual(self.EXPECTED, dict(client._load_candidates()))
+
+    def test_zero_ttl_disables_cache(self):
+        client = self._client(cache_ttl=0)
+        self.assertEqual(self.EXPECTED, dict(client._load_candidates()))
+        self.assertFalse(os.path.exists(self.cache_path))
+
+        client._browse_cmd = ["false"]
+
+        self.assertEqual({}, client._load_candidates())
+
+    def test_invalid_file_is_a_miss(self):
+        other_cmd = json.dumps({"browse_cmd": ["other"], "candidates": self.EXPECTED})
+        bad_ips = json.dumps({"browse_cmd": ["false"], "candidates": {"nas": "10.0.0.20"}})
+        for content in ["[]", "not json", other_cmd, bad_ips]:
+            with self.subTest(content=content):
+                self._write_cache(content)
+                client = self._client(browse_cmd=["false"])
+
+                self.assertEqual([], client.discover_hosts("home"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+# Copyright 2025 Mike Ponomarenko
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import io
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sync import PiHoleClient
+
+
+class StubPiHoleHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        # Drop the socket without announcing it, like an idle timeout would.
+        if self.server.drop_after_reply:
+            self.close_connection = True
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def do_POST(self):
+        self.server.requests.append(("POST", self.path))
+        if self.server.auth_status != 200:
+            self._reply(self.server.auth_status, {"error": "denied"}, {"Location": "/login"})
+        elif self._read_json() != {"password": "secret"}:
+            self._reply(401, {"error": "bad password"})
+        else:
+            self._reply(200, {"session": {"sid": "abc"}})
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path, self.headers.get("sid")))
+        if self.server.fetch_status != 200:
+            self._reply(self.server.fetch_status, {"error": "nope"})
+        else:
+            self._reply(200, {"config": {"dns": {"hosts": self.server.hosts}}})
+
+    def do_PATCH(self):
+        self.server.requests.append(("PATCH", self.path))
+        payload = self._read_json()
+        if self.server.update_status != 200:
+            self._reply(self.server.update_status, {"error": "read-only"})
+        else:
+            self.server.hosts = payload["config"]["dns"]["hosts"]
+            self._reply(200, {})
+
+    def do_DELETE(self):
+        self.server.requests.append(("DELETE", self.path))
+        self._reply(self.server.logout_status)
+
+
+class PiHoleClientTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubPiHoleHandler)
+        self.server.requests = []
+        self.server.hosts = []
+        self.server.auth_status = 200
+        self.server.fetch_status = 200
+        self.server.update_status = 200
+        self.server.logout_status = 204
+        self.server.drop_after_reply = False
+        self.server.daemon_threads = True
+        thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.api_url = f"http://127.0.0.1:{self.server.server_port}/api"
+
+    def _client(self):
+        client = PiHoleClient(self.api_url, " secret\n")
+        self.addCleanup(client.close)
+        return client
+
+    def test_fetch_update_and_logout(self):
+        self.server.hosts = ["10.0.0.20 nas.home"]
+        client = PiHoleClient(self.api_url, "secret")
+
+        self.assertEqual({"nas.home": "10.0.0.20"}, client.fetch_hosts())
+        client.update_hosts({"nas.home": "10.0.0.20", "printer.home": "10.0.0.50"})
+        client.close()
+
+        self.assertEqual(["10.0.0.20 nas.home", "10.0.0.50 printer.home"], self.server.hosts)
+        self.assertEqual(
+            [
+                ("POST", "/api/auth"),
+                ("GET", "/api/config/dns%2Fhosts", "abc"),
+                ("PATCH", "/api/config/dns%2Fhosts"),
+                ("DELETE", "/api/auth"),
+            ],
+            self.server.requests,
+        )
+
+    def test_fetch_accepts_any_whitespace_layout(self):
+        self.server.hosts = [
+            "10.0.0.1\thost1",
+            "10.0.0.2  host2",
+            " 10.0.0.3 host3",
+            "10.0.0.4 host4 alias4 alias4b",
+            "bogus",
+        ]
+        client = self._client()
+        stderr = io.StringIO()
+
+        with contextlib.redirect_stderr(stderr):
+            dns_map = client.fetch_hosts()
+
+        self.assertEqual(
+            {
+                "host1": "10.0.0.1",
+                "host2": "10.0.0.2",
+                "host3": "10.0.0.3",
+                "host4": "10.0.0.4",
+            },
+            dns_map,
+        )
+        self.assertEqual("[WARN] Unexpected hosts entry: bogus\n", stderr.getvalue())
+
+    def test_reconnects_after_idle_disconnect(self):
+        self.server.hosts = ["10.0.0.20 nas.home"]
+        self.server.drop_after_reply = True
+        client = self._client()
+
+        self.assertEqual({"nas.home": "10.0.0.20"}, client.fetch_hosts())
+        self.assertEqual({"nas.home": "10.0.0.20"}, client.fetch_hosts())
+
+    def test_rejected_password_raises(self):
+        with self.assertRaisesRegex(RuntimeError, "authentication failed: .*bad password"):
+            PiHoleClient(self.api_url, "wrong")
+
+    def test_redirected_auth_raises(self):
+        self.server.auth_status = 302
+
+        with self.assertRaisesRegex(RuntimeError, "authentication failed"):
+            PiHoleClient(self.api_url, "secret")
+
+    def test_empty_token_raises(self):
+        with self.assertRaisesRegex(RuntimeError, "Empty PIHOLE_TOKEN"):
+            PiHoleClient(self.api_url, "  ")
+
+    def test_fetch_error_status_raises(self):
+        self.server.fetch_status = 500
+        client = self._client()
+
+        with self.assertRaisesRegex(RuntimeError, "Failed to fetch Pi-hole config: 500"):
+            client.fetch_hosts()
+
+    def test_update_error_status_raises(self):
+        self.server.update_status = 403
+        client = self._client()
+
+        with self.assertRaisesRegex(RuntimeError, "Failed to update Pi-hole config: 403"):
+            client.update_hosts({"nas.home": "10.0.0.20"})
+
+    def test_logout_failure_warns(self):
+        self.server.logout_status = 500
+        client = PiHoleClient(self.api_url, "secret")
+        stderr = io.StringIO()
+
+        with contextlib.redirect_stderr(stderr):
+            client.close()
+
+        self.assertIn("[WARN] Pi-hole logout failed: 500", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
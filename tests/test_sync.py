@@ -12,10 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import contextlib
+import io
+import os
 import unittest
+from unittest import mock
 
 from avahi import HostRecord
-from sync import sync_iteration
+from sync import main, sync_iteration
 
 
 class FakePiHoleClient:
@@ -67,7 +72,7 @@ class SyncIterationTests(unittest.TestCase):
             ]
         )
 
-        result = sync_iteration(pihole, avahi, "home", keep_local=False)
+        result = asyncio.run(sync_iteration(pihole, avahi, "home", keep_local=False))
 
         expected = {"truenas.home": "10.0.0.10"}
         self.assertEqual(expected, result)
@@ -86,7 +91,7 @@ class SyncIterationTests(unittest.TestCase):
             ]
         )
 
-        result = sync_iteration(pihole, avahi, "home", keep_local=False)
+        result = asyncio.run(sync_iteration(pihole, avahi, "home", keep_local=False))
 
         expected = {"tower.home": "10.0.115.5"}
         self.assertEqual(expected, result)
@@ -111,7 +116,7 @@ class SyncIterationTests(unittest.TestCase):
             ]
         )
 
-        result = sync_iteration(pihole, avahi, "home", keep_local=False)
+        result = asyncio.run(sync_iteration(pihole, avahi, "home", keep_local=False))
 
         expected = {
             "nas.home": "10.0.0.20",
@@ -120,6 +125,24 @@ class SyncIterationTests(unittest.TestCase):
         self.assertEqual(expected, result)
         self.assertEqual(expected, pihole.updated_hosts)
 
+    def test_unchanged_hosts_skip_update(self):
+        pihole = FakePiHoleClient({"nas.home": "10.0.0.20"})
+        avahi = MockAvahiClient(
+            [
+                HostRecord(
+                    base_name="nas",
+                    fqdn="nas.local",
+                    preferred_ip="10.0.0.20",
+                    candidates=("10.0.0.20",),
+                )
+            ]
+        )
+
+        result = asyncio.run(sync_iteration(pihole, avahi, "home", keep_local=False))
+
+        self.assertEqual({"nas.home": "10.0.0.20"}, result)
+        self.assertIsNone(pihole.updated_hosts)
+
     def test_keep_local_adds_local_variant(self):
         pihole = FakePiHoleClient({})
         avahi = MockAvahiClient(
@@ -133,7 +156,7 @@ class SyncIterationTests(unittest.TestCase):
             ]
         )
 
-        result = sync_iteration(pihole, avahi, "home", keep_local=True)
+        result = asyncio.run(sync_iteration(pihole, avahi, "home", keep_local=True))
 
         expected = {
             "tower.home": "10.0.115.5",
@@ -142,6 +165,75 @@ class SyncIterationTests(unittest.TestCase):
         self.assertEqual(expected, result)
         self.assertEqual(expected, pihole.updated_hosts)
 
+    def test_keep_local_change_warns_once(self):
+        pihole = FakePiHoleClient({"tower.home": "10.0.115.4", "tower.local": "10.0.115.4"})
+        avahi = MockAvahiClient(
+            [
+                HostRecord(
+                    base_name="tower",
+                    fqdn="tower.local",
+                    preferred_ip="10.0.115.5",
+                    candidates=("10.0.115.5", "10.0.115.4"),
+                )
+            ]
+        )
+        stderr = io.StringIO()
+
+        with contextlib.redirect_stderr(stderr):
+            result = asyncio.run(sync_iteration(pihole, avahi, "home", keep_local=True))
+
+        expected = {
+            "tower.home": "10.0.115.5",
+            "tower.local": "10.0.115.5",
+        }
+        self.assertEqual(expected, result)
+        self.assertEqual(
+            [
+                "[WARN] Updating information for tower.home, tower.local: "
+                "Avahi candidates ['10.0.115.5', '10.0.115.4'] -> chosen 10.0.115.5"
+            ],
+            stderr.getvalue().splitlines(),
+        )
+
+    def test_missing_preferred_ip_warns_once_and_skips(self):
+        pihole = FakePiHoleClient({"nas.home": "10.0.0.20"})
+        avahi = MockAvahiClient(
+            [
+                HostRecord(
+                    base_name="printer",
+                    fqdn="printer.local",
+                    preferred_ip="",
+                    candidates=(),
+                )
+            ]
+        )
+        stderr = io.StringIO()
+
+        with contextlib.redirect_stderr(stderr):
+            result = asyncio.run(sync_iteration(pihole, avahi, "home", keep_local=True))
+
+        self.assertEqual({"nas.home": "10.0.0.20"}, result)
+        self.assertIsNone(pihole.updated_hosts)
+        self.assertEqual(
+            ["[WARN] No preferred IP resolved for printer.local; skipping"],
+            stderr.getvalue().splitlines(),
+        )
+
+
+class MainTests(unittest.TestCase):
+    def test_invalid_cache_ttl_exits(self):
+        for value in ["30s", "-1", "nan"]:
+            with self.subTest(value=value):
+                env = {"PIHOLE_TOKEN": "secret", "AVAHI_CACHE_TTL": value}
+                stderr = io.StringIO()
+
+                with mock.patch.dict(os.environ, env), contextlib.redirect_stderr(stderr):
+                    with self.assertRaises(SystemExit) as ctx:
+                        main()
+
+                self.assertEqual(1, ctx.exception.code)
+                self.assertEqual("[ERROR] Invalid AVAHI_CACHE_TTL\n", stderr.getvalue())
+
 
 if __name__ == "__main__":
     unittest.main()